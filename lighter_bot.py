@@ -1,26 +1,43 @@
 import asyncio
-import aiohttp
-import json
+import httpx
+import orjson
+from array import array
+import functools
 import hmac
-import hashlib
+import itertools
 import time
 import random
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import logging
+import logging.handlers
+import queue
+import atexit
 from datetime import datetime, timedelta
-import uuid
-
-# Configure logging
+import secrets
+
+# Configure logging. Handlers sit behind a QueueHandler so that file and
+# stream writes happen on the listener thread; QueueHandler.prepare() still
+# formats the record on the calling thread, but only the I/O moves off it.
+# The QueueHandler gets a pass-through formatter: the full line format is
+# applied once, by the listener-side handlers.
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("trading_bot.log"),
-        logging.StreamHandler()
-    ]
+    format='%(message)s',
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
+)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler("trading_bot.log"),
+    logging.StreamHandler()
 )
+for _handler in _log_listener.handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 class OrderSide(Enum):
@@ -31,13 +48,18 @@ class OrderType(Enum):
     LIMIT = "LIMIT"
     MARKET = "MARKET"
 
-@dataclass
+@dataclass(slots=True)
 class AccountConfig:
     account_name: str
     api_key: str
     secret_key: str
+    secret_key_bytes: bytes = None
+
+    def __post_init__(self):
+        if self.secret_key_bytes is None:
+            self.secret_key_bytes = self.secret_key.encode()
 
-@dataclass
+@dataclass(slots=True)
 class TradingConfig:
     base_url: str = "https://api.lighter.xyz"
     request_timeout: int = 30
@@ -46,25 +68,80 @@ class TradingConfig:
     max_session_duration: int = 2100  # 35 minutes in seconds
     min_daily_sessions: int = 70
     max_daily_sessions: int = 180
+    market_data_ttl: float = 0.5  # seconds a cached market data snapshot stays fresh
     max_position_size: float = 0.1  # Maximum position size in ETH or other base currency
     symbols: List[str] = None  # Will be populated from API
 
     def __post_init__(self):
         if self.symbols is None:
             self.symbols = ["ETH-USDC", "BTC-USDC"]  # Default symbols
+        self.symbols = tuple(self.symbols)  # tuples index faster than lists
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     session_id: str
     symbol: str
     account1_long: bool
-    start_time: datetime
+    start_time: datetime  # wall clock, for display only
+    start_monotonic: float  # monotonic clock, for duration math
     planned_duration: int
     end_time: Optional[datetime] = None
+    end_monotonic: Optional[float] = None
     account1_order_id: Optional[str] = None
     account2_order_id: Optional[str] = None
     closed: bool = False
 
+@functools.lru_cache(maxsize=256)
+def _sig_suffix(method: str, endpoint: str) -> bytes:
+    """Pre-encoded method+endpoint tail of the signature payload.
+
+    The endpoint set is small and stable, so caching skips the f-string
+    interpolation and encode on every signed request; only the nonce
+    prefix varies per call.
+    """
+    return (method + endpoint).encode()
+
+
+class SessionHistory:
+    """Columnar store for completed session stats.
+
+    Numeric columns live in preallocated typed arrays instead of one
+    dict-backed object per session, so a long-running bot pays a few
+    bytes per session rather than ~1 KB, and PnL aggregation is a sum
+    over a compact array slice instead of a Python attribute loop.
+    """
+
+    def __init__(self, capacity: int, symbols: List[str]):
+        self.capacity = capacity
+        self.count = 0
+        self.session_ids: List[str] = []
+        self._symbol_index = {symbol: i for i, symbol in enumerate(symbols)}
+        self._start = array('d', [0.0] * capacity)
+        self._duration = array('d', [0.0] * capacity)
+        self._symbol = array('b', [0] * capacity)
+        self._account1_long = array('b', [0] * capacity)
+        self._position_size = array('d', [0.0] * capacity)
+        self._total_pnl = array('d', [0.0] * capacity)
+
+    def record(self, session: Session, position_size: float, total_pnl: float):
+        """Append a completed session's stats"""
+        if self.count >= self.capacity:
+            return  # daily cap reached; run_daily_cycle never exceeds it
+        i = self.count
+        self.session_ids.append(session.session_id)
+        self._start[i] = session.start_monotonic
+        self._duration[i] = session.end_monotonic - session.start_monotonic
+        self._symbol[i] = self._symbol_index.get(session.symbol, -1)
+        self._account1_long[i] = int(session.account1_long)
+        self._position_size[i] = position_size
+        self._total_pnl[i] = total_pnl
+        self.count = i + 1
+
+    def total_pnl(self) -> float:
+        """Aggregate PnL across all recorded sessions"""
+        return sum(self._total_pnl[:self.count])
+
+
 class LighterTradingBot:
     def __init__(self, account_configs: List[AccountConfig], trading_config: TradingConfig):
         if len(account_configs) != 2:
@@ -72,36 +149,52 @@ class LighterTradingBot:
         
         self.account_configs = account_configs
         self.trading_config = trading_config
-        self.sessions: List[Session] = []
+        # Bounded so a long-running bot doesn't accumulate session objects
+        # forever; the oldest entries are evicted automatically
+        self.sessions: Deque[Session] = deque(maxlen=trading_config.max_daily_sessions)
+        self.history = SessionHistory(trading_config.max_daily_sessions, trading_config.symbols)
         self.active_session: Optional[Session] = None
         self.session_task: Optional[asyncio.Task] = None
         self.is_running = False
+        self._nonce_counter = itertools.count()
+        # Dedicated RNG instance: avoids contention on the module-level
+        # generator's shared state if threads are ever added
+        self._rng = random.Random()
+        self._md_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._md_inflight: Dict[str, asyncio.Future] = {}
         
-        # Create a session for each account
-        self.sessions_per_account = [
-            aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.trading_config.request_timeout))
-            for _ in range(2)
-        ]
+        # One shared HTTP/2 client for both accounts: long-lived multiplexed
+        # streams to the API host avoid per-request handshakes and the
+        # keepalive stalls seen with idle pooled connections. Authentication
+        # is per-request via headers.
+        self.client = httpx.AsyncClient(
+            base_url=self.trading_config.base_url,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=32, keepalive_expiry=120),
+            timeout=self.trading_config.request_timeout
+        )
         
         logger.info("LighterTradingBot initialized with delta neutral strategy")
 
     async def close(self):
         """Clean up resources"""
-        for session in self.sessions_per_account:
-            await session.close()
+        await self.client.aclose()
         logger.info("LighterTradingBot shutdown complete")
 
-    def _generate_signature(self, secret_key: str, payload: str) -> str:
+    def _generate_signature(self, account_index: int, payload: bytes) -> str:
         """Generate HMAC-SHA256 signature"""
-        return hmac.new(
-            secret_key.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
+        # hmac.digest takes the one-shot OpenSSL path, which uses the
+        # hardware SHA extensions when available
+        secret = self.account_configs[account_index].secret_key_bytes
+        return hmac.digest(secret, payload, 'sha256').hex()
 
     def _get_nonce(self) -> int:
         """Generate unique nonce for each request"""
-        return int(time.time() * 1000)
+        # Integer-only path with a counter suffix so two requests in the
+        # same millisecond (e.g. back-to-back orders) never share a nonce.
+        # Slot width matches the 10-bit mask so suffixes can't spill into
+        # the next millisecond's range
+        return (time.time_ns() // 1_000_000) * 1024 + (next(self._nonce_counter) & 0x3FF)
 
     async def _make_request(self, account_index: int, method: str, endpoint: str, **kwargs) -> Dict:
         """Make authenticated API request with retry logic"""
@@ -113,39 +206,84 @@ class LighterTradingBot:
 
         # Add authentication if needed
         if not endpoint.startswith("/public"):
-            nonce = self._get_nonce()
-            signature_payload = f"{nonce}{method}{endpoint}"
-            signature = self._generate_signature(account_config.secret_key, signature_payload)
+            nonce_str = str(self._get_nonce())
+            signature = self._generate_signature(
+                account_index, nonce_str.encode() + _sig_suffix(method, endpoint)
+            )
             headers.update({
-                "X-NONCE": str(nonce),
+                "X-NONCE": nonce_str,
                 "X-SIGNATURE": signature
             })
 
-        url = f"{self.trading_config.base_url}{endpoint}"
-
         for attempt in range(self.trading_config.max_retries):
             try:
-                async with self.sessions_per_account[account_index].request(
-                    method, url, headers=headers, **kwargs
-                ) as response:
-                    data = await response.json()
-
-                    if response.status != 200:
-                        logger.error(f"API error {response.status} for account {account_index}: {data}")
-                        raise Exception(f"API error: {data}")
-
-                    return data
+                response = await self.client.request(
+                    method, endpoint, headers=headers, **kwargs
+                )
+                status = response.status_code
+                raw = response.content
+
+                if status == 200:
+                    # Empty bodies (e.g. 204-style cancels) skip the parse
+                    return orjson.loads(raw) if raw else {}
+
+                # Error bodies are parsed solely for logging; gateways often
+                # answer 502/503 with HTML, so fall back to the raw text
+                try:
+                    data = orjson.loads(raw) if raw else {}
+                except orjson.JSONDecodeError:
+                    data = raw.decode(errors='replace')
+                if 400 <= status < 500 and status != 429:
+                    # Client errors won't succeed on retry; fail fast
+                    logger.error("API error %s for account %s: %s", status, account_index, data)
+                    raise Exception(f"API error: {data}")
+
+                # 429 and 5xx are worth retrying
+                logger.warning("Retryable API error %s (attempt %s) for account %s: %s", status, attempt + 1, account_index, data)
+                if attempt == self.trading_config.max_retries - 1:
+                    raise Exception(f"API error: {data}")
 
-            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                logger.warning(f"Request failed (attempt {attempt + 1}) for account {account_index}: {str(e)}")
+            except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                logger.warning("Request failed (attempt %s) for account %s: %s", attempt + 1, account_index, e)
                 if attempt == self.trading_config.max_retries - 1:
                     raise
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+
+            # Exponential backoff with jitter so the two accounts' retries
+            # don't synchronize into a retry storm
+            delay = min(2 ** attempt * (1 + self._rng.uniform(0, 0.5)), 30)
+            await asyncio.sleep(delay)
 
     async def get_market_data(self, symbol: str) -> Dict:
-        """Get current market data for a symbol"""
-        endpoint = f"/public/markets/{symbol}"
-        return await self._make_request(0, "GET", endpoint)  # Use first account for public data
+        """Get current market data for a symbol, cached for a short TTL"""
+        ttl = self.trading_config.market_data_ttl
+        cached = self._md_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+
+        # Single-flight: if a fetch for this symbol is already in the air,
+        # piggyback on it instead of issuing a duplicate request
+        inflight = self._md_inflight.get(symbol)
+        if inflight is not None:
+            return await inflight
+
+        future = asyncio.get_running_loop().create_future()
+        self._md_inflight[symbol] = future
+        try:
+            endpoint = f"/public/markets/{symbol}"
+            data = await self._make_request(0, "GET", endpoint)  # Use first account for public data
+            self._md_cache[symbol] = (time.monotonic(), data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # waiters re-raise; suppress never-retrieved noise
+            raise
+        finally:
+            # On cancellation the except clause never ran; cancel the future
+            # so piggybacked waiters don't await it forever
+            if not future.done():
+                future.cancel()
+            self._md_inflight.pop(symbol, None)
 
     async def get_balance(self, account_index: int) -> Dict:
         """Get user account balance"""
@@ -167,7 +305,23 @@ class LighterTradingBot:
         if price is not None:
             order_data["price"] = str(price)
 
-        return await self._make_request(account_index, "POST", endpoint, json=order_data)
+        # Pre-serialize with orjson rather than letting the client run the
+        # payload through stdlib json on the hot order path
+        return await self._make_request(account_index, "POST", endpoint, content=orjson.dumps(order_data))
+
+    async def place_orders_batch(self, account_index: int, orders: List[Dict]) -> List[Dict]:
+        """Place several orders for one account in a single request.
+
+        One round trip to /private/orders/batch instead of one per order;
+        worthwhile whenever a flow submits multiple orders per account.
+        The delta neutral flow places a single order per account per leg,
+        so it keeps per-order calls gathered across accounts.
+        """
+        endpoint = "/private/orders/batch"
+        response = await self._make_request(
+            account_index, "POST", endpoint, content=orjson.dumps({"orders": orders})
+        )
+        return response.get("orders", [])
 
     async def cancel_order(self, account_index: int, order_id: str) -> Dict:
         """Cancel an existing order"""
@@ -189,12 +343,25 @@ class LighterTradingBot:
     async def close_all_orders(self, account_index: int, symbol: str):
         """Close all open orders for a symbol"""
         open_orders = await self.get_open_orders(account_index, symbol)
-        for order in open_orders:
-            try:
-                await self.cancel_order(account_index, order['id'])
-                logger.info(f"Cancelled order {order['id']} for account {account_index}")
-            except Exception as e:
-                logger.error(f"Failed to cancel order {order['id']} for account {account_index}: {str(e)}")
+        if not open_orders:
+            return
+
+        # Cancels are independent, so overlap their round trips; the
+        # semaphore keeps a large open-order list from flooding the API
+        sem = asyncio.Semaphore(8)
+
+        async def _cancel(order):
+            async with sem:
+                return await self.cancel_order(account_index, order['id'])
+
+        results = await asyncio.gather(
+            *(_cancel(order) for order in open_orders), return_exceptions=True
+        )
+        for order, result in zip(open_orders, results):
+            if isinstance(result, Exception):
+                logger.error("Failed to cancel order %s for account %s: %s", order['id'], account_index, result)
+            else:
+                logger.info("Cancelled order %s for account %s", order['id'], account_index)
 
     async def execute_delta_neutral_session(self):
         """Execute a delta neutral trading session"""
@@ -203,15 +370,15 @@ class LighterTradingBot:
             return
 
         # Choose random parameters for this session
-        symbol = random.choice(self.trading_config.symbols)
-        account1_long = random.choice([True, False])
-        duration = random.randint(
+        symbol = self._rng.choice(self.trading_config.symbols)
+        account1_long = bool(self._rng.getrandbits(1))
+        duration = self._rng.randint(
             self.trading_config.min_session_duration,
             self.trading_config.max_session_duration
         )
         
         # Generate a unique session ID
-        session_id = str(uuid.uuid4())[:8]
+        session_id = secrets.token_hex(4)
         
         # Create session object
         session = Session(
@@ -219,15 +386,16 @@ class LighterTradingBot:
             symbol=symbol,
             account1_long=account1_long,
             start_time=datetime.now(),
+            start_monotonic=time.monotonic(),
             planned_duration=duration
         )
         
         self.active_session = session
         self.sessions.append(session)
         
-        logger.info(f"Starting delta neutral session {session_id} on {symbol}, "
-                   f"Account1 {'long' if account1_long else 'short'}, "
-                   f"Duration: {duration}s")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Starting delta neutral session %s on %s, Account1 %s, Duration: %ss",
+                        session_id, symbol, 'long' if account1_long else 'short', duration)
         
         try:
             # Get current market price
@@ -235,60 +403,55 @@ class LighterTradingBot:
             current_price = float(market_data['last_price'])
             
             # Determine position size (random but within limits)
-            position_size = random.uniform(
+            position_size = self._rng.uniform(
                 self.trading_config.max_position_size * 0.3,
                 self.trading_config.max_position_size
             )
             
-            # Place opposing orders
+            # Place opposing orders concurrently: the legs are independent
+            # and firing them together minimizes the delta exposure window
             if account1_long:
                 # Account 1 goes long, Account 2 goes short
-                order1 = await self.place_order(
-                    0, symbol, OrderSide.BUY, OrderType.MARKET, position_size
-                )
-                order2 = await self.place_order(
-                    1, symbol, OrderSide.SELL, OrderType.MARKET, position_size
+                order1, order2 = await asyncio.gather(
+                    self.place_order(0, symbol, OrderSide.BUY, OrderType.MARKET, position_size),
+                    self.place_order(1, symbol, OrderSide.SELL, OrderType.MARKET, position_size)
                 )
             else:
                 # Account 1 goes short, Account 2 goes long
-                order1 = await self.place_order(
-                    0, symbol, OrderSide.SELL, OrderType.MARKET, position_size
-                )
-                order2 = await self.place_order(
-                    1, symbol, OrderSide.BUY, OrderType.MARKET, position_size
+                order1, order2 = await asyncio.gather(
+                    self.place_order(0, symbol, OrderSide.SELL, OrderType.MARKET, position_size),
+                    self.place_order(1, symbol, OrderSide.BUY, OrderType.MARKET, position_size)
                 )
             
             session.account1_order_id = order1.get('id')
             session.account2_order_id = order2.get('id')
             
-            logger.info(f"Session {session_id}: Opened positions - "
-                       f"Account1: {order1['id']}, Account2: {order2['id']}, "
-                       f"Size: {position_size}, Price: {current_price}")
+            logger.info("Session %s: Opened positions - Account1: %s, Account2: %s, Size: %s, Price: %s",
+                        session_id, order1['id'], order2['id'], position_size, current_price)
             
             # Wait for the planned duration
             await asyncio.sleep(duration)
             
-            # Close positions in opposite direction
+            # Close positions in opposite direction, again both legs at once
             if account1_long:
                 # Account 1 sells, Account 2 buys to close
-                close_order1 = await self.place_order(
-                    0, symbol, OrderSide.SELL, OrderType.MARKET, position_size
-                )
-                close_order2 = await self.place_order(
-                    1, symbol, OrderSide.BUY, OrderType.MARKET, position_size
+                close_order1, close_order2 = await asyncio.gather(
+                    self.place_order(0, symbol, OrderSide.SELL, OrderType.MARKET, position_size),
+                    self.place_order(1, symbol, OrderSide.BUY, OrderType.MARKET, position_size)
                 )
             else:
                 # Account 1 buys, Account 2 sells to close
-                close_order1 = await self.place_order(
-                    0, symbol, OrderSide.BUY, OrderType.MARKET, position_size
-                )
-                close_order2 = await self.place_order(
-                    1, symbol, OrderSide.SELL, OrderType.MARKET, position_size
+                close_order1, close_order2 = await asyncio.gather(
+                    self.place_order(0, symbol, OrderSide.BUY, OrderType.MARKET, position_size),
+                    self.place_order(1, symbol, OrderSide.SELL, OrderType.MARKET, position_size)
                 )
             
-            # Update session info
+            # Update session info; elapsed time comes from the monotonic
+            # clock, which NTP steps can't corrupt
             session.end_time = datetime.now()
+            session.end_monotonic = time.monotonic()
             session.closed = True
+            elapsed = session.end_monotonic - session.start_monotonic
             
             # Get closing price
             market_data = await self.get_market_data(symbol)
@@ -304,21 +467,22 @@ class LighterTradingBot:
                 account2_pnl = position_size * price_change_pct
             
             total_pnl = account1_pnl + account2_pnl
-            
-            logger.info(f"Session {session_id}: Closed positions - "
-                       f"Account1 PnL: {account1_pnl:.4f}, "
-                       f"Account2 PnL: {account2_pnl:.4f}, "
-                       f"Total PnL: {total_pnl:.4f}, "
-                       f"Duration: {duration}s")
+            self.history.record(session, position_size, total_pnl)
+
+            logger.info("Session %s: Closed positions - Account1 PnL: %.4f, Account2 PnL: %.4f, "
+                        "Total PnL: %.4f, Duration: %.1fs",
+                        session_id, account1_pnl, account2_pnl, total_pnl, elapsed)
             
         except Exception as e:
-            logger.error(f"Session {session_id} failed: {str(e)}")
+            logger.error("Session %s failed: %s", session_id, e)
             # Attempt to close any open positions
             try:
-                await self.close_all_orders(0, symbol)
-                await self.close_all_orders(1, symbol)
+                await asyncio.gather(
+                    self.close_all_orders(0, symbol),
+                    self.close_all_orders(1, symbol)
+                )
             except Exception as close_error:
-                logger.error(f"Failed to close positions after error: {str(close_error)}")
+                logger.error("Failed to close positions after error: %s", close_error)
         finally:
             self.active_session = None
 
@@ -327,12 +491,12 @@ class LighterTradingBot:
         self.is_running = True
         
         # Calculate number of sessions for today
-        daily_sessions = random.randint(
+        daily_sessions = self._rng.randint(
             self.trading_config.min_daily_sessions,
             self.trading_config.max_daily_sessions
         )
         
-        logger.info(f"Starting daily cycle with {daily_sessions} sessions")
+        logger.info("Starting daily cycle with %s sessions", daily_sessions)
         
         # Calculate minimum delay between sessions (spread out over 24 hours)
         min_delay = (24 * 3600) / daily_sessions
@@ -345,16 +509,18 @@ class LighterTradingBot:
             try:
                 await self.execute_delta_neutral_session()
             except Exception as e:
-                logger.error(f"Session {session_num + 1} failed: {str(e)}")
+                logger.error("Session %s failed: %s", session_num + 1, e)
             
             # Calculate delay until next session (randomized but ensuring we fit all sessions)
-            delay = random.uniform(min_delay * 0.7, min_delay * 1.3)
-            logger.info(f"Completed session {session_num + 1}/{daily_sessions}. Next session in {delay/60:.1f} minutes")
+            delay = self._rng.uniform(min_delay * 0.7, min_delay * 1.3)
+            logger.info("Completed session %s/%s. Next session in %.1f minutes",
+                        session_num + 1, daily_sessions, delay / 60)
             
             # Wait for next session
             await asyncio.sleep(delay)
         
-        logger.info("Daily cycle completed")
+        logger.info("Daily cycle completed: %s sessions, total PnL %.4f",
+                    self.history.count, self.history.total_pnl())
 
     def stop(self):
         """Stop the trading bot"""
@@ -386,17 +552,25 @@ async def main():
         # Check balances before starting
         for i, account in enumerate(account_configs):
             balance = await bot.get_balance(i)
-            logger.info(f"{account.account_name} balance: {balance}")
+            logger.info("%s balance: %s", account.account_name, balance)
         
         # Run the daily cycle
         await bot.run_daily_cycle()
         
     except Exception as e:
-        logger.error(f"Trading bot error: {str(e)}")
+        logger.error("Trading bot error: %s", e)
         raise
     finally:
         await bot.close()
 
 if __name__ == "__main__":
+    # Use uvloop's C event loop when available; the default asyncio loop
+    # adds noticeable per-callback overhead on this await-heavy workload
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     # Run the bot
     asyncio.run(main())